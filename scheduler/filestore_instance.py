@@ -21,39 +21,104 @@ This module uses the application default credentials
 of the GCP Cloud Function ServiceAccount.
 """
 
+import concurrent.futures
 import logging
+import queue
+import random
+import re
 import socket
+import threading
 import time
+import google.auth
+import google.auth.credentials
+import google.auth.transport.requests
+import google_auth_httplib2
 import googleapiclient
 from googleapiclient import discovery
-import oauth2client
-logging.basicConfig(
-    format="%(asctime)s [%(levelname)s] %(message)s", level=logging.INFO)
+from googleapiclient import discovery_cache
+from googleapiclient import http as googleapiclient_http
+from googleapiclient import model
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+
+def _bootstrap_logging() -> None:
+  """Configures the log format and level for all the function modules."""
+  logging.basicConfig(
+      format="%(asctime)s [%(levelname)s] %(message)s", level=logging.INFO)
+
+
+_bootstrap_logging()
 logger = logging.getLogger(__name__)
 
+
+def _orjson_deserialize(self, content):
+  """A faster drop-in replacement for JsonModel.deserialize, using orjson."""
+  try:
+    body = orjson.loads(content)
+  except orjson.JSONDecodeError:
+    if isinstance(content, bytes):
+      content = content.decode("utf-8")
+    return content
+  if self._data_wrapper and isinstance(body, dict) and "data" in body:
+    body = body["data"]
+  return body
+
+
+# Parse the API responses with orjson when it is installed.
+if orjson is not None:
+  model.JsonModel.deserialize = _orjson_deserialize
+
 # The service client library
 SERVICE = "file"
 # The API version
 # Might change as new preview features launched
 API_VERSION = "v1"
-# Time pattern format. e.g: 20220303-153000
+# Time pattern format of new snapshot names. e.g: 20220303-153000
 TIME_PATTERN = "%Y%m%d-%H%M%S"
+# Matches a TIME_PATTERN formatted timestamp
+TIMESTAMP_REGEX = re.compile(r"\d{8}-\d{6}")
 # Filestore snapshot name prefix
 SNAP_PREFIX = "sched-"
 # Filestore tiers support snapshots feature.
 # Refer https://cloud.google.com/filestore/docs/create-snapshots#supported_tiers
 SUPPORTED_TIERS = ["ENTERPRISE", "ZONAL"]
+_SUPPORTED_TIERS_STR = ", ".join(SUPPORTED_TIERS)
+# OAuth scopes requested for the application default credentials
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
 # Maximum number of snapshots per Filestore instance
 # Refer https://cloud.google.com/filestore/docs/limits#number_of_snapshots
 MAX_NUMBER_OF_SNAPSHOTS = 240
 # Maximum number of attempts for snapshot creation/deletion
 MAX_RETRIES = 3
+# Maximum number of seconds to wait between attempts
+MAX_BACKOFF = 60
+# HTTP statuses of transient API errors, worth another attempt.
+# Any other HTTP error (e.g. 400, 403, 404) is permanent and fails fast.
+_RETRIABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# Seconds since the operation started at which its status is polled.
+# Derived offline from a log-normal fit of observed snapshot creation times,
+# placing each poll to minimize the expected completion detection delay.
+POLL_OFFSETS = (15, 35, 60, 95, 140, 200, 280, 420)
+# Maximum number of seconds to wait for an operation to complete
+MONITOR_DEADLINE = 600
+
+# Process-wide caches, shared by all instances and warm function invocations.
+_credentials = None
+_discovery_doc = None
+_cache_lock = threading.Lock()
+# Idle authorized HTTP clients. Each keeps its connections to the API alive,
+# but can only be used by a single thread at a time.
+_http_pool = queue.SimpleQueue()
 
 
 def retry(func, retries=MAX_RETRIES, backoff=2):
   """A retry decorator.
 
-  Calls a function and re-executes it if it failed.
+  Calls a function and re-executes it if it failed on a transient error,
+  waiting an exponential backoff with jitter between attempts.
 
   Args:
     func: the function to execute.
@@ -69,21 +134,110 @@ def retry(func, retries=MAX_RETRIES, backoff=2):
     while attempts < retries:
       try:
         return func(*(args))
-      except googleapiclient.errors.Error as err:
+      except googleapiclient.errors.HttpError as err:
         logger.error("Attempt %i out of %i failed", attempts + 1, retries)
         log_gcp_api_err(err)
+        if err.resp.status not in _RETRIABLE_STATUSES:
+          logger.error("Error %s is not retriable.", err.resp.status)
+          return None
+      except googleapiclient.errors.Error as err:
+        logger.error("Attempt %i out of %i failed", attempts + 1, retries)
+        logger.error("Error: %s", err)
       except socket.timeout:
         logger.error("Attempt %i out of %i failed", attempts + 1, retries)
         logger.error("Timeout reached. Failed to complete operation.")
-      sleep = backoff**(attempts + 1)
-      logger.info("Waiting %i seconds before next retry", sleep)
-      time.sleep(sleep)
       attempts += 1
+      if attempts < retries:
+        sleep = min(MAX_BACKOFF, backoff**attempts) + random.random()
+        logger.info("Waiting %.1f seconds before next retry", sleep)
+        time.sleep(sleep)
     logger.error("Reached a maximum number of %i retries.", retries)
 
   return retry_wrapper
 
 
+def _get_credentials() -> google.auth.credentials.Credentials:
+  """Returns the application default credentials, looked up only once.
+
+  An access token is fetched right away, so the API clients of all instances
+  reuse it instead of each refreshing it on its first request.
+  """
+  global _credentials
+  if _credentials is None:
+    with _cache_lock:
+      if _credentials is None:
+        credentials, _ = google.auth.default(scopes=SCOPES)
+        credentials.refresh(google.auth.transport.requests.Request())
+        _credentials = credentials
+  return _credentials
+
+
+def _get_discovery_doc() -> str or None:
+  """Returns the Filestore API discovery document, loaded only once."""
+  global _discovery_doc
+  if _discovery_doc is None:
+    with _cache_lock:
+      if _discovery_doc is None:
+        _discovery_doc = discovery_cache.get_static_doc(SERVICE, API_VERSION)
+  return _discovery_doc
+
+
+def _acquire_http():
+  """Takes an idle authorized HTTP client from the pool, or builds one."""
+  try:
+    return _http_pool.get_nowait()
+  except queue.Empty:
+    return google_auth_httplib2.AuthorizedHttp(
+        _get_credentials(), http=googleapiclient_http.build_http())
+
+
+def _release_http(http) -> None:
+  """Returns an HTTP client to the pool for reuse by other instances."""
+  _http_pool.put(http)
+
+
+def _build_filestore_api(http) -> discovery.Resource:
+  """Builds a Filestore API client on top of an authorized HTTP client."""
+  discovery_doc = _get_discovery_doc()
+  if discovery_doc:
+    return discovery.build_from_document(discovery_doc, http=http)
+  filestore_api_resource = discovery.build(
+      SERVICE, API_VERSION, http=http, cache_discovery=False)
+  return filestore_api_resource
+
+
+@retry
+def _list_instances(filestore_api: discovery.Resource,
+                    parent: str) -> dict[str:dict[str:str]]:
+  """Lists the Filestore instances of a location, following all pages."""
+  instances = filestore_api.projects().locations().instances()
+  request = instances.list(
+      parent=parent, fields="instances(name,tier,state),nextPageToken")
+  instances_json = {}
+  while request is not None:
+    response = request.execute()
+    for instance_json in response.get("instances", []):
+      instances_json[instance_json["name"]] = instance_json
+    request = instances.list_next(request, response)
+  return instances_json
+
+
+def list_instances(parent: str) -> dict[str:dict[str:str]] or None:
+  """Gets the details of all the Filestore instances of a location at once.
+
+  Args:
+    parent: The location url, i.e. projects/{project}/locations/{location}.
+
+  Returns:
+    A dict of the instances details by instance url, or None on failure.
+  """
+  http = _acquire_http()
+  try:
+    return _list_instances(_build_filestore_api(http), parent)
+  finally:
+    _release_http(http)
+
+
 def log_gcp_api_err(err):
   logger.error("Error %s: %s", err.status_code, err.reason)
 
@@ -92,6 +246,32 @@ class InstanceNotFoundError(Exception):
   pass
 
 
+class OperationPoller(object):
+  """A schedule of polls for a long-running operation.
+
+  Attributes:
+    offsets: Increasing seconds since the operation started at which to poll.
+  """
+
+  def __init__(self, offsets: tuple[int] = POLL_OFFSETS) -> None:
+    self.offsets = tuple(offsets)
+
+  def delays(self):
+    """Yields the number of seconds to sleep before each poll.
+
+    Once the offsets are exhausted, the last interval repeats indefinitely,
+    so the caller is responsible for bounding the polling.
+    """
+    previous = 0
+    delay = 1
+    for offset in self.offsets:
+      delay = offset - previous
+      yield delay
+      previous = offset
+    while True:
+      yield delay
+
+
 class FilestoreInstance(object):
   """A Filestore instance object.
 
@@ -102,59 +282,74 @@ class FilestoreInstance(object):
     url: The instance_path value taken from the user JSON input.
     name: The instance name taken from the url attribute.
     max_snapshots: The user input for number of snapshots to keep.
+    filestore_api: Filestore client API resource.
     project: Filestore client API project resource.
     location: Filestore client API location resource.
     operation: Filestore client API operation resource.
     instance: Filestore client API instance resource.
     snapshot: Filestore client API snapshot resource.
+    http: The authorized HTTP client used by the API resources.
     filestore_instance_json: The instance details.
     snapshots: The instance list of snapshots.
     scheduler_snapshots: The instance list of snapshots part of the running
       retention_policy.
-    oldest_sched_snapshot: The oldest snapshot in the scheduler_snapshots.
     tier: The Filestore instance tier type.
     state: The Filestore instance state.
   """
 
   def __init__(self, instance_data: dict[str:str],
-               retention_policy: str) -> None:
+               retention_policy: str,
+               preloaded_json: dict[str:str] = None) -> None:
     """Inits a FilestoreInstance object.
 
     Args:
       instance_data: The Filestore instance data taken from the user JSON input.
       retention_policy: The scheduler retention policy name.
+      preloaded_json: The instance details, if already known. Otherwise they
+        are retrieved from the API.
 
     Raises:
       InstanceNotFoundError: The instance details were not received.
     """
 
     self.retention_policy = retention_policy
+    self._sched_prefix = f"{SNAP_PREFIX}{retention_policy}-"
+    self._sched_regex = re.compile(
+        re.escape(self._sched_prefix) + TIMESTAMP_REGEX.pattern)
     self.url = instance_data.get("instance_path").lstrip("/").strip("/")
     self.name = get_resource_name(self.url)
     self.max_snapshots = int(instance_data.get("snapshots"))
-    self.project = self._filestore_build().projects()
+    self._snapshots = None
+    self._snapshots_listed = False
+    self._scheduler_snapshots = None
+    self.http = _acquire_http()
+    self.filestore_api = self._filestore_build()
+    self.project = self.filestore_api.projects()
     self.location = self.project.locations()
     self.operation = self.location.operations()
     self.instance = self.location.instances()
     self.snapshot = self.instance.snapshots()
-    self.filestore_instance_json = self._get_instance()
+    self.filestore_instance_json = preloaded_json or self._get_instance()
     if not self.filestore_instance_json:
+      self.close()
       raise InstanceNotFoundError
-    self.snapshots = self._list_snapshots()
-    self.scheduler_snapshots = self.get_scheduler_snapshots_list()
-    self.oldest_sched_snapshot = self.get_oldest_scheduler_snapshot()
 
   def _filestore_build(self) -> discovery.Resource:
     """Builds cloud Filestore API client.
 
+    The credentials and discovery document are shared between instances,
+    but every instance gets its own client since those are not thread-safe.
+
     Returns:
       A Filestore API Resource
     """
-    credentials = oauth2client.client.GoogleCredentials.get_application_default(
-    )
-    filestore_api_resource = discovery.build(
-        SERVICE, API_VERSION, credentials=credentials, cache_discovery=False)
-    return filestore_api_resource
+    return _build_filestore_api(self.http)
+
+  def close(self) -> None:
+    """Releases the instance HTTP client, so its connections can be reused."""
+    if self.http is not None:
+      _release_http(self.http)
+      self.http = None
 
   @retry
   def _get_instance(self) -> dict[str:str]:
@@ -163,7 +358,7 @@ class FilestoreInstance(object):
     Returns:
       A dict includes the Filestore instance details.
     """
-    request = self.instance.get(name=self.url)
+    request = self.instance.get(name=self.url, fields="tier,state")
     response = request.execute()
     return response
 
@@ -188,7 +383,8 @@ class FilestoreInstance(object):
     Returns:
       A list includes the Filestore instance's snapshots and their details.
     """
-    request = self.snapshot.list(parent=self.url)
+    request = self.snapshot.list(
+        parent=self.url, fields="snapshots(name,state)")
     response = request.execute()
     return response.get("snapshots", [])
 
@@ -210,11 +406,15 @@ class FilestoreInstance(object):
       return operation_url
     return None
 
-  def _monitor_operation(self, operation_url: str) -> bool:
+  def _monitor_operation(self, operation_url: str,
+                         deadline_s: int = MONITOR_DEADLINE,
+                         poller: OperationPoller = None) -> bool:
     """Check if the requested Filestore operation is completed successfully.
 
     Args:
       operation_url: The operation url to monitor.
+      deadline_s: The maximum number of seconds to wait for the operation.
+      poller: The poll schedule to follow. Defaults to POLL_OFFSETS.
 
     Returns:
       An indication if the operation is completed successfully.
@@ -222,74 +422,137 @@ class FilestoreInstance(object):
     logger.info(
         "Start monitoring operation %s.", get_resource_name(operation_url))
     logger.info("This might take a few minutes...")
-    monitor_attempts = 8
-    attempt = 1
-    while attempt <= monitor_attempts:
+    poller = poller or OperationPoller()
+    start = time.monotonic()
+    for delay in poller.delays():
+      remaining = deadline_s - (time.monotonic() - start)
+      if remaining <= 0:
+        break
+      time.sleep(max(1, min(remaining, delay)))
       operation_details = self._get_operation(operation_url)
-      if operation_details:
-        if operation_details.get("done", False):
-          if operation_details.get("response", False):
-            logger.info(
-                "Snapshot creation as part of %s is completed successfully.",
-                get_resource_name(operation_url))
-            return True
-          if operation_details.get("error", False):
-            err = operation_details["error"]
-            logger.error("Error %i: %s", err["code"], err["message"])
-            return False
-        if attempt < monitor_attempts:
-          time.sleep(2 ** attempt)
-        attempt += 1
-      else:
+      if not operation_details:
         logger.error("Could not receive the operation details")
         return False
-    logger.error("Reached a maximum number of %i monitor retries.",
-                 monitor_attempts)
+      completed = self._operation_completed(
+          operation_url, operation_details, start)
+      if completed is not None:
+        return completed
+    logger.error("Operation %s did not complete within %i seconds.",
+                 get_resource_name(operation_url), deadline_s)
     return False
 
+  def _operation_completed(self, operation_url: str,
+                           operation_details: dict[str:str],
+                           start: float) -> bool or None:
+    """Check the outcome of a Filestore operation.
+
+    Args:
+      operation_url: The operation url.
+      operation_details: The operation details received from the API.
+      start: The time.monotonic() value when the monitoring started.
+
+    Returns:
+      An indication if the operation is completed successfully, or None if
+      it is still running.
+    """
+    if operation_details.get("done", False):
+      if operation_details.get("response", False):
+        logger.info(
+            "Snapshot creation as part of %s is completed successfully "
+            "after %i seconds.",
+            get_resource_name(operation_url), time.monotonic() - start)
+        return True
+      if operation_details.get("error", False):
+        err = operation_details["error"]
+        logger.error("Error %i: %s", err["code"], err["message"])
+        return False
+    return None
+
   @retry
-  def _delete_snapshot(self) -> bool:
-    """Delete the oldest_sched_snapshot from the given Filestore instance.
+  def _delete_snapshots(self, snapshot_names: list[str],
+                        filestore_api: discovery.Resource = None) -> bool:
+    """Delete the given snapshots from the Filestore instance in a single batch.
+
+    Args:
+      snapshot_names: The full names of the snapshots to delete.
+      filestore_api: The Filestore API client to use. Defaults to the
+        filestore_api attribute.
 
     Returns:
-      An indication if the operation is received successfully.
+      An indication if all the operations are received successfully.
     """
-    request = self.snapshot.delete(name=self.oldest_sched_snapshot)
-    response = request.execute()
-    operation_id = get_resource_name(response["name"])
-    logger.info(
-        "Snapshot deletion of %s is running as part of %s.",
-        get_resource_name(self.oldest_sched_snapshot), operation_id)
-    return bool(operation_id)
+    failures = []
+
+    def delete_callback(request_id, response, exception):
+      snapshot_id = get_resource_name(request_id)
+      if exception is not None:
+        logger.error("Snapshot deletion of %s failed.", snapshot_id)
+        log_gcp_api_err(exception)
+        failures.append(request_id)
+        return
+      logger.info(
+          "Snapshot deletion of %s is running as part of %s.",
+          snapshot_id, get_resource_name(response["name"]))
+
+    filestore_api = filestore_api or self.filestore_api
+    snapshot = filestore_api.projects().locations().instances().snapshots()
+    batch = filestore_api.new_batch_http_request(callback=delete_callback)
+    for snapshot_name in snapshot_names:
+      batch.add(snapshot.delete(name=snapshot_name), request_id=snapshot_name)
+    batch.execute()
+    return not failures
+
+  def _delete_snapshots_in_background(self, snapshot_names: list[str]) -> bool:
+    """Delete the given snapshots using a dedicated HTTP client.
+
+    Safe to run in another thread while this instance makes other API calls.
+
+    Args:
+      snapshot_names: The full names of the snapshots to delete.
 
-  def deletion_needed(self) -> bool:
-    """Check if the Filestore instance retention policy is met and a snapshot should be deleted.
+    Returns:
+      An indication if all the operations are received successfully.
+    """
+    http = _acquire_http()
+    try:
+      return self._delete_snapshots(snapshot_names, _build_filestore_api(http))
+    finally:
+      _release_http(http)
+
+  def deletion_needed(self) -> int:
+    """Check how many snapshots should be deleted to meet the retention policy.
+
+    Assumes a new scheduler snapshot was created on top of the
+    scheduler_snapshots.
 
     Returns:
-      An indication if a snapshot should be deleted for the Filestore instance
-      retention policy.
+      The number of snapshots to delete for the Filestore instance retention
+      policy.
     """
-    if len(self.scheduler_snapshots) == self.max_snapshots:
+    excess_snapshots = len(self.scheduler_snapshots) - self.max_snapshots + 1
+    if excess_snapshots == 1:
       logger.info("A single snapshot should be deleted.")
-      return True
-    elif len(self.scheduler_snapshots) > self.max_snapshots:
+      return excess_snapshots
+    elif excess_snapshots > 1:
       logger.warning(
           "The retention policy doesn't match the number of snapshots.")
-      logger.info("Still going to delete a single snapshot.")
-      return True
+      logger.info("Going to delete %i snapshots.", excess_snapshots)
+      return excess_snapshots
     else:
       logger.info(
           "The number of snapshots does not reach the retention policy.")
       logger.info("No need to delete snapshots.")
-      return False
+      return 0
 
   def validate_instance_requirements(self) -> bool:
     """Validate if the Filestore instance meets requirements.
 
     The requirements are:
     1. Instance tier is supported.
-    2. Instance does not reach the number of snapshot limitation.
-    3. Instance is in READY state.
+    2. Instance is in READY state.
+    3. Instance does not reach the number of snapshot limitation.
+
+    The snapshots are only listed once the instance details checks pass.
 
     Returns:
       An indication if the Filestore instance meets the above requirements.
@@ -297,19 +560,22 @@ class FilestoreInstance(object):
     if self.tier not in SUPPORTED_TIERS:
       logger.error(
           "Instance %s is not of %s tier.",
-          self.name, ", ".join(SUPPORTED_TIERS))
+          self.name, _SUPPORTED_TIERS_STR)
+      return False
+    if self.state != "READY":
+      logger.error("Instance %s is not in a READY state.", self.name)
+      return False
+    if self.snapshots is None:
+      logger.error("Failed to list the snapshots of instance %s.", self.name)
       return False
     if len(self.snapshots) == MAX_NUMBER_OF_SNAPSHOTS:
       logger.error(
           "Instance %s reached maximum number of %i snapshots.",
           self.name, MAX_NUMBER_OF_SNAPSHOTS)
       return False
-    if self.state != "READY":
-      logger.error("Instance %s is not in a READY state.", self.name)
-      return False
     return True
 
-  def get_scheduler_snapshots_list(self) -> list[str]:
+  def _scan_scheduler_snapshots(self) -> list[str]:
     """Filter the Filestore instance snapshots which are part of the retention policy.
 
     Returns:
@@ -317,44 +583,87 @@ class FilestoreInstance(object):
     """
     scheduler_snapshots_list = []
     for snapshot in self.snapshots:
-      if f"{SNAP_PREFIX}{self.retention_policy}-" in snapshot["name"]:
-        if snapshot["state"] == "READY":
-          scheduler_snapshots_list.append(snapshot["name"])
+      if snapshot["state"] != "READY":
+        continue
+      # The full name shape tells apart policies sharing a prefix, e.g.
+      # daily and daily-2.
+      if self._sched_regex.fullmatch(get_resource_name(snapshot["name"])):
+        scheduler_snapshots_list.append(snapshot["name"])
     return scheduler_snapshots_list
 
-  def get_oldest_scheduler_snapshot(self) -> str or None:
-    """Detect the oldest snapshot out of the instance snapshot list.
+  def _snapshot_timestamp(self, snapshot: str) -> str:
+    """Returns the TIME_PATTERN suffix of a scheduler snapshot name.
+
+    TIME_PATTERN sorts lexicographically in chronological order, so the
+    suffix can be compared as is without parsing it.
+    """
+    return get_resource_name(snapshot)[len(self._sched_prefix):]
+
+  def get_scheduler_snapshots_by_age(self) -> list[str]:
+    """Sort the scheduler snapshots by their creation time.
 
     Returns:
-      The oldest snapshot name or None if scheduler_snapshots_list is empty.
+      The scheduler_snapshots list, oldest first.
     """
-    epoch_dict = {}
-    if self.scheduler_snapshots:
-      snapshot_string_len = len(SNAP_PREFIX + self.retention_policy) + 1
-      for snapshot in self.scheduler_snapshots:
-        snapshot_date = get_resource_name(snapshot)[snapshot_string_len:]
-        epoch_dict[snapshot] = int(time.mktime(time.strptime(
-            snapshot_date, TIME_PATTERN)))
-      return min(epoch_dict, key=epoch_dict.get)
-    else:
-      return None
+    return sorted(self.scheduler_snapshots, key=self._snapshot_timestamp)
 
-  def increment_retention(self) -> None:
-    """Create a new snapshot for the requested Filestore instance and delete one if needed."""
+  def _create_and_monitor(self) -> bool:
+    """Create a retention snapshot and wait for its creation to complete.
+
+    Returns:
+      An indication if the snapshot is created successfully.
+    """
     operation_url = self._create_snapshot()
-    if operation_url:
-      creation_completed = self._monitor_operation(operation_url)
-      if creation_completed:
-        logger.info(
-            "%i %s scheduler snapshots are found.",
-            len(self.scheduler_snapshots), self.retention_policy)
-        logger.info(
-            "The retention policy is set to %i snapshots.", self.max_snapshots)
-        if self.deletion_needed():
-          self._delete_snapshot()
-      else:
-        logger.error(
-            "Snapshot creation failed. Not going to delete one either.")
+    if not operation_url:
+      return False
+    return self._monitor_operation(operation_url)
+
+  def increment_retention(self) -> None:
+    """Create a new snapshot for the requested Filestore instance and delete old ones if needed.
+
+    Snapshots beyond the retention policy, even without the new snapshot, are
+    deleted while the new one is being created. The snapshot making room for
+    the new one is deleted only after it is created successfully.
+    """
+    logger.info(
+        "%i %s scheduler snapshots are found.",
+        len(self.scheduler_snapshots), self.retention_policy)
+    logger.info(
+        "The retention policy is set to %i snapshots.", self.max_snapshots)
+    snapshots_by_age = self.get_scheduler_snapshots_by_age()
+    snapshots_to_delete = self.deletion_needed()
+    stale_snapshots = max(0, snapshots_to_delete - 1)
+    stale_deletion = None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+      if stale_snapshots:
+        stale_deletion = pool.submit(
+            self._delete_snapshots_in_background,
+            snapshots_by_age[:stale_snapshots])
+      creation_completed = self._create_and_monitor()
+    if stale_deletion:
+      stale_deletion.result()
+    if not creation_completed:
+      logger.error(
+          "Snapshot creation failed. Not going to delete one for it either.")
+      return
+    if snapshots_to_delete:
+      self._delete_snapshots(
+          snapshots_by_age[stale_snapshots:snapshots_to_delete])
+
+  @property
+  def snapshots(self) -> list[dict[str:str]] or None:
+    """The instance snapshots, listed on first access."""
+    if not self._snapshots_listed:
+      self._snapshots = self._list_snapshots()
+      self._snapshots_listed = True
+    return self._snapshots
+
+  @property
+  def scheduler_snapshots(self) -> list[str]:
+    """The retention policy snapshots, filtered on first access."""
+    if self._scheduler_snapshots is None:
+      self._scheduler_snapshots = self._scan_scheduler_snapshots()
+    return self._scheduler_snapshots
 
   @property
   def tier(self) -> str or None:
@@ -369,3 +678,16 @@ def get_resource_name(resource_url: str) -> str:
   """Returns the GCP resource name, excluding the full URI."""
   return resource_url.split("/")[-1]
 
+
+def split_instance_url(instance_url: str) -> tuple[str, str, str] or None:
+  """Splits a projects/{project}/locations/{location}/instances/{name} url.
+
+  Returns:
+    A tuple of the project, location and instance names, or None if the url
+    is of another form.
+  """
+  parts = instance_url.strip("/").split("/")
+  if len(parts) != 6 or parts[0::2] != ["projects", "locations", "instances"]:
+    return None
+  return parts[1], parts[3], parts[5]
+
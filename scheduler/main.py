@@ -24,19 +24,34 @@ a user-defined JSON file.
 The JSON file consists a list of Filestore instances to run the function on.
 """
 
+import collections
+import concurrent.futures
 import logging
 import filestore_instance
 import jsonschema
 import werkzeug
 
-logging.basicConfig(
-    format="%(asctime)s [%(levelname)s] %(message)s", level=logging.INFO)
+# Logging is configured once by filestore_instance on import.
 logger = logging.getLogger(__name__)
 
 # The retention policy name maximum length of characters
 RETENTION_NAME_LENGTH = 50
 # Maximum number of Filestore instances per JSON file
 MAX_INSTANCES = 8
+# The JSON file user input schema
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "retention_policy": {
+            "type": "string"
+        },
+        "instances": {
+            "type": "array"
+        },
+    },
+}
+jsonschema.Draft7Validator.check_schema(SCHEMA)
+_VALIDATOR = jsonschema.Draft7Validator(SCHEMA)
 
 
 def validate_json_schema(request_json: dict[str:str]) -> bool:
@@ -48,20 +63,8 @@ def validate_json_schema(request_json: dict[str:str]) -> bool:
   Returns:
     An indication if the JSON file user input meets the schema.
   """
-  schema = {
-      "type": "object",
-      "properties": {
-          "retention_policy": {
-              "type": "string"
-          },
-          "instances": {
-              "type": "array"
-          },
-      },
-  }
-  try:
-    jsonschema.validate(instance=request_json, schema=schema)
-  except jsonschema.exceptions.ValidationError as err:
+  err = jsonschema.exceptions.best_match(_VALIDATOR.iter_errors(request_json))
+  if err is not None:
     logger.error("JSON schema validation error. Details: %s", err.message)
     return False
   return True
@@ -141,6 +144,65 @@ def validate_instance_input(instance_data: dict[str:str]) -> bool:
   return True
 
 
+def _preload_instances(instance_paths: list[str]) -> dict[str:dict[str:str]]:
+  """Get the details of Filestore instances sharing a location in one request.
+
+  Instances which are alone in their location are left out, as a single
+  instance get request is as cheap as listing the location.
+
+  Args:
+    instance_paths: The Filestore instances paths user input.
+
+  Returns:
+    A dict of the preloaded instances details by instance url.
+  """
+  locations = collections.defaultdict(list)
+  for instance_path in instance_paths:
+    url_parts = filestore_instance.split_instance_url(instance_path)
+    if url_parts:
+      project_id, location_id, _ = url_parts
+      locations[f"projects/{project_id}/locations/{location_id}"].append(
+          instance_path)
+  preloaded = {}
+  for parent, urls in locations.items():
+    if len(urls) > 1:
+      preloaded.update(filestore_instance.list_instances(parent) or {})
+  return preloaded
+
+
+def _process_instance(instance_data: dict[str:str],
+                      retention_policy: str,
+                      preloaded_json: dict[str:str] = None) -> bool:
+  """Run the retention policy on a single Filestore instance.
+
+  Args:
+    instance_data: The Filestore instance user input.
+    retention_policy: The scheduler retention policy name.
+    preloaded_json: The instance details, if already retrieved.
+
+  Returns:
+    An indication if the function executed on the instance without error.
+  """
+  instance_path = instance_data["instance_path"]
+  logger.info("Start executing function on instance %s.", instance_path)
+  try:
+    filer = filestore_instance.FilestoreInstance(instance_data,
+                                                 retention_policy,
+                                                 preloaded_json)
+  except filestore_instance.InstanceNotFoundError:
+    logger.error("Failed to retrieve Filestore instance details")
+    logger.info("Finish executing function with error on instance %s.",
+                instance_path)
+    return False
+  try:
+    if filer.validate_instance_requirements():
+      filer.increment_retention()
+  finally:
+    filer.close()
+  logger.info("Finish executing function on instance %s.", instance_path)
+  return True
+
+
 def main(request):
   try:
     request_json = request.get_json(force=True)
@@ -151,21 +213,30 @@ def main(request):
   if not validate_json(request_json):
     return "done with error"
   retention_policy = request_json.get("retention_policy")
-  for instance_data in request_json["instances"]:
-    if validate_instance_input(instance_data):
-      instance_path = instance_data["instance_path"]
-      logger.info("Start executing function on instance %s.", instance_path)
+  instances = [
+      instance_data for instance_data in request_json["instances"]
+      if validate_instance_input(instance_data)
+  ]
+  preloaded = _preload_instances(
+      [instance_data["instance_path"] for instance_data in instances])
+  # The work per instance is I/O bound, so instances are handled concurrently.
+  # Each FilestoreInstance builds its own API client, as those are not
+  # thread-safe.
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers=MAX_INSTANCES) as pool:
+    futures = {
+        pool.submit(
+            _process_instance, instance_data, retention_policy,
+            preloaded.get(instance_data["instance_path"].strip("/"))):
+            instance_data["instance_path"]
+        for instance_data in instances
+    }
+    for future in concurrent.futures.as_completed(futures):
+      instance_path = futures[future]
       try:
-        filer = filestore_instance.FilestoreInstance(instance_data,
-                                                     retention_policy)
-      except filestore_instance.InstanceNotFoundError:
-        logger.error("Failed to retrieve Filestore instance details")
-        logger.info("Finish executing function with error on instance %s.",
-                    instance_path)
-        continue
-      if filer.validate_instance_requirements():
-        filer.increment_retention()
-      logger.info("Finish executing function on instance %s.", instance_path)
+        future.result()
+      except Exception:  # pylint: disable=broad-except
+        logger.exception("Unexpected error on instance %s.", instance_path)
   logger.info("Finish job cycle")
   return "done"
 